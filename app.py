@@ -1,55 +1,226 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pac
 import io
-import plotly.express as px
-import networkx as nx
-from pyvis.network import Network
-import tempfile
-import os
+import csv
+import hashlib
+import re
 
 st.set_page_config(layout="wide")
 
-# Define a function to find synergy between the user and a connection
-def find_synergy(user_profile, connection):
-    synergy = {
-        'company': False,
-        'industry': False,
-        'title_match': False,
-        'title_complementary': False,
-    }
+# Column names based on their order in the LinkedIn export format
+connection_columns = ['first_name', 'last_name', 'url', 'email_address', 'company', 'position', 'connected_on']
+
+# Low-cardinality columns stored as categoricals (integer codes plus a dictionary of labels)
+categorical_columns = ['company', 'position', 'connected_on']
+
+# Display labels for the boolean synergy columns
+synergy_labels = {
+    'syn_company': 'Company',
+    'syn_industry': 'Industry',
+    'syn_title_match': 'Title Match',
+    'syn_title_complementary': 'Title Complementary',
+}
+
+# Reason text for every combination of synergy flags, indexed by the flags packed into a bitmask
+synergy_reasons = np.array([
+    ', '.join(label for i, label in enumerate(synergy_labels.values()) if code >> i & 1)
+    for code in range(1 << len(synergy_labels))
+], dtype=object)
+
+# Above this many synergistic connections, details are shown as one table instead of expanders
+max_expander_rows = 50
 
-    # Normalize user and connection data for consistent matching
+# Complementary roles for each user title (a simple dictionary lookup)
+complementary_roles = {
+    'product manager': ['software engineer', 'ux designer', 'data analyst'],
+    'data analyst': ['data scientist', 'business analyst', 'financial analyst'],
+}
+
+# Compile each title's complementary roles once into a single alternation regex,
+# so every position string is scanned once instead of once per role
+complementary_role_patterns = {
+    title: re.compile('|'.join(map(re.escape, roles))) for title, roles in complementary_roles.items()
+}
+
+# Define a function to test a categorical column for a substring with Arrow's string kernels
+def contains_substring(values, pattern):
+    # Scan each distinct string once, then broadcast the matches through the category codes
+    matches = pc.match_substring(pa.array(values.cat.categories, type=pa.string()), pattern).to_numpy(zero_copy_only=False)
+    return pd.Series(matches[values.cat.codes.to_numpy()], index=values.index)
+
+# Define a function to find synergy between the user and every connection at once
+def find_synergy(user_profile, df):
+    # Normalize user data for consistent matching
     user_company = user_profile.get('company', '').strip().lower()
     user_industry = user_profile.get('industry', '').strip().lower()
     user_title = user_profile.get('title', '').strip().lower()
-    
-    conn_company = str(connection.get('company', '')).strip().lower()
-    conn_position = str(connection.get('position', '')).strip().lower()
+
+    # Connection columns are normalized once when the file is loaded
+    comp = df['_company_lc']
+    pos = df['_position_lc']
 
     # Synergy Logic
-    if conn_company and user_company and conn_company == user_company:
-        synergy['company'] = True
-    
+    company_syn = (comp != '') & (comp == user_company) if user_company else pd.Series(False, index=df.index)
+
     # A simple check for industry keywords
-    if user_industry and (user_industry in conn_company or user_industry in conn_position):
-        synergy['industry'] = True
-        
-    # Check for direct title matches
-    if user_title and (user_title in conn_position or conn_position in user_title):
-        synergy['title_match'] = True
-    
-    # Check for complementary roles (a simple dictionary lookup)
-    complementary_roles = {
-        'product manager': ['software engineer', 'ux designer', 'data analyst'],
-        'data analyst': ['data scientist', 'business analyst', 'financial analyst'],
+    if user_industry:
+        industry_syn = contains_substring(comp, user_industry) | contains_substring(pos, user_industry)
+    else:
+        industry_syn = pd.Series(False, index=df.index)
+
+    # Check for direct title matches in either direction
+    if user_title:
+        # A position can only be contained in the user's title if it is no longer than it,
+        # so only the distinct positions passing that cheap length test are checked in Python
+        positions = pos.cat.categories
+        candidates = positions[positions.str.len() <= len(user_title)]
+        contained = pos.isin([p for p in candidates if p and p in user_title])
+        title_match = contains_substring(pos, user_title) | contained
+    else:
+        title_match = pd.Series(False, index=df.index)
+
+    # Check for complementary roles with the precompiled pattern
+    pattern = complementary_role_patterns.get(user_title)
+    if pattern is not None:
+        complementary_syn = pos.str.contains(pattern, regex=True)
+    else:
+        complementary_syn = pd.Series(False, index=df.index)
+
+    return pd.DataFrame({
+        'company': company_syn,
+        'industry': industry_syn,
+        'title_match': title_match,
+        'title_complementary': complementary_syn,
+    })
+
+# Define a function to detect the delimiter and preamble length of a connections export
+def detect_csv_format(head):
+    # LinkedIn exports may start with a short "Notes:" preamble before the header row,
+    # so skip lines until one looks like a header with at least 6 fields
+    lines = head.split('\n')
+    for skiprows, line in enumerate(lines):
+        if max(line.count(d) for d in ';,\t') >= 5:
+            break
+    else:
+        return None
+
+    try:
+        dialect = csv.Sniffer().sniff('\n'.join(lines[skiprows:]), delimiters=';,\t')
+    except csv.Error:
+        return None
+
+    return dialect.delimiter, skiprows
+
+# Define a function to read the connections file with Arrow's multithreaded CSV reader
+def read_connections(file, sep, skiprows):
+    # Columns are named by position, so skip the preamble and the file's own header row.
+    # Low-cardinality columns are dictionary-encoded and become pandas categoricals.
+    column_types = {
+        col: pa.dictionary(pa.int32(), pa.string()) if col in categorical_columns else pa.string()
+        for col in connection_columns
+    }
+    table = pac.read_csv(
+        file,
+        read_options=pac.ReadOptions(skip_rows=skiprows + 1, column_names=connection_columns),
+        parse_options=pac.ParseOptions(delimiter=sep, newlines_in_values=True, invalid_row_handler=lambda row: 'skip'),
+        convert_options=pac.ConvertOptions(column_types=column_types, strings_can_be_null=True),
+    )
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+
+# Define a cached function to parse an uploaded connections file
+@st.cache_data(show_spinner=False)
+def load_connections(file_key, _file_bytes):
+    # Sniff the format from the start of the file so the CSV is parsed exactly once
+    head = _file_bytes[:8192].decode('utf-8', errors='replace')
+    csv_format = detect_csv_format(head)
+    if csv_format is None:
+        return None
+
+    sep, skiprows = csv_format
+    try:
+        df = read_connections(io.BytesIO(_file_bytes), sep, skiprows)
+    except pa.ArrowInvalid:
+        return None
+
+    # Rows that don't match the export's columns are skipped, so a file with the
+    # wrong column count parses to an empty table rather than failing
+    if df.empty:
+        return None
+
+    # Normalize company and position once so every comparison reuses them,
+    # keeping them categorical so equality tests compare integer codes
+    df['_company_lc'] = df['company'].str.strip().str.lower().fillna('').astype('category')
+    df['_position_lc'] = df['position'].str.strip().str.lower().fillna('').astype('category')
+    return df
+
+# Define a function to count the top companies in a categorical company column
+def count_companies(companies, n):
+    # Categorical value_counts include unused categories, so keep only companies that occur
+    counts = companies.value_counts()
+    top = counts[counts > 0].nlargest(n).reset_index()
+    top.columns = ['Company', 'Connections']
+    return top
+
+# Define a cached function to find the synergistic connections for a file and user profile
+@st.cache_data(show_spinner=False)
+def compute_synergy(file_key, user_profile, _file_bytes):
+    df = load_connections(file_key, _file_bytes)
+    if df is None:
+        return None
+
+    # Compute the four synergy flags for all connections in one pass
+    synergy_flags = find_synergy(dict(user_profile), df)
+    any_syn = synergy_flags.any(axis=1)
+
+    # Keep only synergistic connections, with one boolean column per synergy type
+    synergy_df = df[any_syn].join(synergy_flags[any_syn].add_prefix('syn_'))
+
+    # Create a simple "Synergy Reason" column for the table by packing each row's flags
+    # into a bitmask and looking up the precomputed reason for that combination
+    flags = synergy_df[list(synergy_labels)].to_numpy(dtype=np.uint8)
+    codes = flags @ (1 << np.arange(len(synergy_labels), dtype=np.uint8))
+    synergy_df['Synergy Reason'] = synergy_reasons[codes]
+
+    # Count each synergy type with vectorized reductions over the boolean flags
+    synergy_counts = {
+        'Direct Company Synergy': int(synergy_flags['company'].sum()),
+        'Industry Synergy': int(synergy_flags['industry'].sum()),
+        'Title Synergy': int((synergy_flags['title_match'] | synergy_flags['title_complementary']).sum()),
+        'Other': int((~any_syn).sum()),
     }
-    if user_title in complementary_roles:
-        for role in complementary_roles[user_title]:
-            if role in conn_position:
-                synergy['title_complementary'] = True
-                break
-    
-    return synergy
+
+    # Map each company to the rows of its synergistic connections for O(1) lookups by target company
+    company_rows = synergy_df.groupby('_company_lc', observed=True).indices
+
+    return synergy_df, synergy_counts, company_rows, count_companies(synergy_df['company'], 5)
+
+# Define a cached function to count connections per company in the whole network,
+# for the top companies chart and the target selectbox
+@st.cache_data(show_spinner=False)
+def network_stats(file_key, _file_bytes):
+    df = load_connections(file_key, _file_bytes)
+    return count_companies(df['company'], 10), df['company'].dropna().unique().tolist()
+
+# Define cached functions to build the overview charts from aggregated counts,
+# importing plotly only once there is something to plot
+@st.cache_data(show_spinner=False)
+def build_pie_chart(data, values, names, title):
+    import plotly.express as px
+
+    return px.pie(data, values=values, names=names, title=title)
+
+@st.cache_data(show_spinner=False)
+def build_bar_chart(data, x, y, title):
+    import plotly.graph_objects as go
+
+    # Use a graph object directly to skip plotly express's DataFrame handling
+    fig = go.Figure(go.Bar(x=data[x], y=data[y]))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
 
 # The main function that runs the web application
 def main():
@@ -74,42 +245,19 @@ def main():
     if uploaded_file is not None and all(user_profile.values()):
         st.info("Reading your file. This may take a moment.")
         
-        # This is the new, more robust file reading block
-        df = None
-        
-        # Try a few common delimiters and header skips to find the right format
-        for sep in [';', ',', '\t']:
-            for skiprows in [0, 3]:
-                try:
-                    uploaded_file.seek(0)
-                    df = pd.read_csv(uploaded_file, sep=sep, skiprows=skiprows, on_bad_lines='skip')
-                    if df.shape[1] > 1: # Check if we have more than one column
-                        break
-                except pd.errors.ParserError:
-                    continue
-            if df is not None and df.shape[1] > 1:
-                break
-
-        if df is None or df.shape[1] <= 1:
+        # Parsing and synergy are cached on the file contents and profile, so widget changes skip them.
+        # The upload is hashed once here; the cached functions take the bytes as an unhashed
+        # underscore argument and are keyed on the digest instead.
+        file_bytes = uploaded_file.getvalue()
+        file_key = hashlib.sha256(file_bytes).hexdigest()
+        synergy_result = compute_synergy(file_key, tuple(user_profile.items()), file_bytes)
+
+        if synergy_result is None:
             st.error("Could not parse the file. Please ensure it's a valid CSV/TSV format and try again.")
             return
 
-        # Manually set column names based on their order in the LinkedIn export format
-        df.columns = ['first_name', 'last_name', 'url', 'email_address', 'company', 'position', 'connected_on']
-
-        connections_list = df.to_dict('records')
-        synergistic_connections = []
-
-        for conn in connections_list:
-            synergy_info = find_synergy(user_profile, conn)
-            
-            # If any synergy is found, add the connection to our list
-            if any(synergy_info.values()):
-                conn['synergy'] = synergy_info
-                synergistic_connections.append(conn)
-
-        # Create a DataFrame for easier display
-        synergy_df = pd.DataFrame(synergistic_connections)
+        synergy_df, synergy_counts, company_rows, top_companies = synergy_result
+        all_companies, all_companies_list = network_stats(file_key, file_bytes)
         
         # === START OF NEW LAYOUT ===
         st.header("Analysis Results")
@@ -119,35 +267,22 @@ def main():
         
         with col1:
             # Create a DataFrame for the Pie Chart of Synergy Breakdown
-            synergy_counts = {
-                'Direct Company Synergy': sum(1 for c in synergistic_connections if c['synergy']['company']),
-                'Industry Synergy': sum(1 for c in synergistic_connections if c['synergy']['industry']),
-                'Title Synergy': sum(1 for c in synergistic_connections if c['synergy']['title_match'] or c['synergy']['title_complementary']),
-                'Other': len(connections_list) - len(synergistic_connections)
-            }
-            
             synergy_data = pd.DataFrame(list(synergy_counts.items()), columns=['Synergy Type', 'Number of Connections'])
             
             # Display the Pie Chart for Synergy Breakdown
-            fig_synergy = px.pie(synergy_data, values='Number of Connections', names='Synergy Type', title='Network Synergy Breakdown')
-            st.plotly_chart(fig_synergy, use_container_width=True)
+            fig_synergy = build_pie_chart(synergy_data, 'Number of Connections', 'Synergy Type', 'Network Synergy Breakdown')
+            st.plotly_chart(fig_synergy, use_container_width=True, config={'staticPlot': True})
 
         with col2:
-            # Create a DataFrame for the Pie Chart of Top Companies
-            if 'company' in synergy_df.columns and not synergy_df['company'].isnull().all():
-                top_companies = synergy_df['company'].value_counts().nlargest(5).reset_index()
-                top_companies.columns = ['Company', 'Connections']
-                
-                fig_companies = px.pie(top_companies, values='Connections', names='Company', title='Top Companies in Your Network')
-                st.plotly_chart(fig_companies, use_container_width=True)
+            # Display the Pie Chart of Top Companies
+            if not top_companies.empty:
+                fig_companies = build_pie_chart(top_companies, 'Connections', 'Company', 'Top Companies in Your Network')
+                st.plotly_chart(fig_companies, use_container_width=True, config={'staticPlot': True})
 
         with col3:
-            # Count all companies in the network (not just synergistic ones)
-            if 'company' in df.columns and not df['company'].isnull().all():
-                all_companies = df['company'].value_counts().nlargest(10).reset_index()
-                all_companies.columns = ['Company', 'Connections']
-                
-                fig_all_companies = px.bar(all_companies, x='Company', y='Connections', title='Top 10 Companies in Your Network')
+            # Display the top companies in the whole network (not just synergistic ones)
+            if not all_companies.empty:
+                fig_all_companies = build_bar_chart(all_companies, 'Company', 'Connections', 'Top 10 Companies in Your Network')
                 st.plotly_chart(fig_all_companies, use_container_width=True)
         # === END OF NEW LAYOUT ===
         
@@ -158,7 +293,6 @@ def main():
         col_target_company, col_target_role = st.columns(2)
         
         with col_target_company:
-            all_companies_list = df['company'].unique().tolist()
             target_company = st.selectbox("Select a Target Company", options=all_companies_list, index=0)
 
         with col_target_role:
@@ -168,43 +302,51 @@ def main():
             st.markdown("---")
             st.write(f"### Path to {target_role} at {target_company}")
             
-            # Create a NetworkX graph for this specific path
-            G_path = nx.Graph()
-            
-            # Add user and target role nodes
-            user_node = user_profile['title'] + " (You)"
-            target_node = target_role + f" at {target_company}"
-            
-            G_path.add_node(user_node, title="You", color='green', size=30)
-            G_path.add_node(target_node, title=target_role, color='orange', size=25)
-            
+            # The graph library is imported on first use to keep the app's cold start fast
+            from pyvis.network import Network
+
             # Find relevant connections in the target company
-            relevant_connections = synergy_df[synergy_df['company'] == target_company]
-            
-            if not relevant_connections.empty:
-                for index, row in relevant_connections.iterrows():
-                    conn_name = f"{row['first_name']} {row['last_name']}"
-                    conn_title = row['position']
-                    
-                    # Add connection node
-                    G_path.add_node(conn_name, title=conn_title, color='lightblue', size=15)
-                    
-                    # Add edges from user to connections
-                    G_path.add_edge(user_node, conn_name)
-                    
-                    # Check for title synergy to add edge from connection to target role
-                    if target_role.lower() in conn_title.lower():
-                        G_path.add_edge(conn_name, target_node, title="Direct Title Match", color='red')
-                    
-            # Create a Pyvis network and display the graph
+            target_company_lc = str(target_company).strip().lower()
+            target_role_lc = target_role.strip().lower()
+            relevant_connections = synergy_df.iloc[company_rows.get(target_company_lc, [])]
+
+            names = (relevant_connections['first_name'].fillna('') + ' ' + relevant_connections['last_name'].fillna('')).to_numpy()
+            titles = relevant_connections['position'].astype(object).fillna('').to_numpy()
+            titles_lc = relevant_connections['_position_lc'].to_numpy(dtype=str)
+
+            # Key connections by name so duplicate names collapse into a single node
+            connections = dict(zip(names, titles))
+
+            # Create a Pyvis network and feed it nodes and edges directly.
+            # Every node gets a precomputed position so vis.js can skip the physics simulation.
             net = Network(height="600px", width="100%", bgcolor="#222222", font_color="white", cdn_resources='remote', directed=True)
-            net.from_nx(G_path)
+            net.toggle_physics(False)
+
+            # Lay the path out left to right: you, a ring of connections, then the target role
+            user_node = user_profile['title'] + " (You)"
+            target_node = target_role + f" at {target_company}"
+            radius = 100 * (len(connections) + 2) ** 0.5
+
+            net.add_node(user_node, label=user_node, title="You", color='green', size=30, x=-1.5 * radius, y=0, physics=False)
+            net.add_node(target_node, label=target_node, title=target_role, color='orange', size=25, x=1.5 * radius, y=0, physics=False)
+
+            if connections:
+                angles = 2 * np.pi * np.arange(len(connections)) / len(connections)
+                for (name, title), angle in zip(connections.items(), angles):
+                    net.add_node(name, label=name, title=title, color='lightblue', size=15,
+                                 x=radius * np.cos(angle), y=radius * np.sin(angle), physics=False)
+
+                # Add edges from user to connections in one batch
+                net.add_edges([(user_node, n) for n in connections])
+
+                # Check for title synergy with one vectorized scan to add edges from connections to target role
+                match_mask = np.char.find(titles_lc, target_role_lc) >= 0
+                for n in dict.fromkeys(names[match_mask]):
+                    net.add_edge(n, target_node, title="Direct Title Match", color='red')
             
-            with tempfile.NamedTemporaryFile(suffix=".html", delete=False) as fp:
-                html_file = fp.name
-                net.write_html(html_file)
-            st.components.v1.html(open(html_file, 'r', encoding='utf-8').read(), height=650)
-            os.remove(html_file)
+            # Render the HTML in memory instead of round-tripping through a temporary file
+            html_str = net.generate_html(notebook=False)
+            st.components.v1.html(html_str, height=650)
             
         # --- END OF NEW CAREER PATH ANALYSIS AND GRAPH ---
         
@@ -212,22 +354,34 @@ def main():
         st.subheader("Synergistic Connections: Details")
         
         if not synergy_df.empty:
-            # Create a simple "Synergy Reason" column for the table
-            synergy_df['Synergy Reason'] = synergy_df['synergy'].apply(
-                lambda s: ', '.join([k.replace('_', ' ').title() for k, v in s.items() if v])
-            )
-            
-            for index, row in synergy_df.iterrows():
-                with st.expander(f"**{row['first_name']} {row['last_name']}** at **{row['company']}**"):
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown(f"**Position:** {row['position']}")
-                        st.markdown(f"**Synergy:** {row['Synergy Reason']}")
-                    with col2:
-                        if 'url' in row and pd.notnull(row['url']):
-                            st.markdown(f"**LinkedIn URL:** [View Profile]({row['url']})")
-                        if 'connected_on' in row and pd.notnull(row['connected_on']):
-                            st.markdown(f"**Connected On:** {row['connected_on']}")
+            if len(synergy_df) >= max_expander_rows:
+                # Large result sets are shown as a single virtualized table instead of one widget per row
+                display_df = synergy_df[['first_name', 'last_name', 'company', 'position', 'Synergy Reason', 'url', 'connected_on']]
+                st.dataframe(
+                    display_df,
+                    column_config={
+                        'first_name': 'First Name',
+                        'last_name': 'Last Name',
+                        'company': 'Company',
+                        'position': 'Position',
+                        'url': st.column_config.LinkColumn('Profile'),
+                        'connected_on': 'Connected On',
+                    },
+                    use_container_width=True,
+                    hide_index=True,
+                )
+            else:
+                for index, row in synergy_df.iterrows():
+                    with st.expander(f"**{row['first_name']} {row['last_name']}** at **{row['company']}**"):
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.markdown(f"**Position:** {row['position']}")
+                            st.markdown(f"**Synergy:** {row['Synergy Reason']}")
+                        with col2:
+                            if 'url' in row and pd.notnull(row['url']):
+                                st.markdown(f"**LinkedIn URL:** [View Profile]({row['url']})")
+                            if 'connected_on' in row and pd.notnull(row['connected_on']):
+                                st.markdown(f"**Connected On:** {row['connected_on']}")
         else:
             st.info("No synergistic connections found based on your profile.")
 